@@ -1,13 +1,414 @@
+from __future__ import annotations
+
+import asyncio
+import atexit
+import functools
+import hashlib
+import inspect
+import json
 import os
-from openai import OpenAI
-import argparse
+import sqlite3
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Callable, Sequence
+
+from tenacity import retry, retry_if_exception, stop_after_attempt, wait_exponential_jitter
+
+if TYPE_CHECKING:
+    # openai pulls in httpx, pydantic and friends; import them only when a client is built.
+    from openai import AsyncOpenAI, OpenAI
 
 # Base URL for the DeepSeek API. Can be overridden by setting DEEPSEEK_BASE_URL.
 BASE_URL = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com")
 API_KEY = os.getenv("DEEPSEEK_API_KEY")
+MODEL = "deepseek-reasoner"
+# Maximum number of in-flight DeepSeek requests. Can be overridden by setting DEEPSEEK_MAX_CONCURRENCY.
+MAX_CONCURRENCY = max(1, int(os.getenv("DEEPSEEK_MAX_CONCURRENCY", "16")))
+
+# On-disk response cache. Repeated requests within DEEPSEEK_CACHE_TTL seconds
+# are answered locally; a TTL of 0 disables the cache. The default is kept
+# short because quote analyses go stale quickly intraday.
+CACHE_DIR = os.getenv("DEEPSEEK_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "longbridge"))
+CACHE_TTL = int(os.getenv("DEEPSEEK_CACHE_TTL", "300"))
+
+# Shared sync client, created on first use so its keep-alive pool is reused
+# across calls instead of paying a new TLS handshake each time.
+_client: OpenAI | None = None
+
+# Shared async client and request limiter. httpx connection pools and asyncio
+# semaphores are tied to the event loop that created them, so both are rebuilt
+# whenever a new loop starts using them.
+_async_client: AsyncOpenAI | None = None
+_async_sem: asyncio.Semaphore | None = None
+_async_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _get_client() -> OpenAI:
+    """Return the shared OpenAI client pointing to the DeepSeek endpoint."""
+    global _client
+    if _client is None:
+        import httpx
+        from openai import OpenAI
+
+        _client = OpenAI(
+            api_key=API_KEY,
+            base_url=BASE_URL,
+            http_client=httpx.Client(limits=httpx.Limits(max_keepalive_connections=32), timeout=60),
+            # Retries are handled by _retry_transient
+            max_retries=0,
+        )
+    return _client
+
+
+def _init_async() -> tuple[AsyncOpenAI, asyncio.Semaphore]:
+    """Return the AsyncOpenAI client and semaphore for the running event loop."""
+    global _async_client, _async_sem, _async_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_loop is not loop:
+        import httpx
+        from openai import AsyncOpenAI
+
+        limits = httpx.Limits(max_connections=MAX_CONCURRENCY, max_keepalive_connections=MAX_CONCURRENCY)
+        _async_client = AsyncOpenAI(
+            api_key=API_KEY,
+            base_url=BASE_URL,
+            http_client=httpx.AsyncClient(limits=limits),
+            max_retries=0,
+        )
+        _async_sem = asyncio.Semaphore(MAX_CONCURRENCY)
+        _async_loop = loop
+    return _async_client, _async_sem
+
+
+async def _close_async() -> None:
+    """Close the shared async client (and its connection pool) and forget it."""
+    global _async_client, _async_sem, _async_loop
+    client = _async_client
+    _async_client = _async_sem = _async_loop = None
+    if client is not None:
+        await client.close()
+
+
+# Connection used for cache lookups on the calling thread
+_cache_conn: sqlite3.Connection | None = None
+# Single background thread (and its own connection) that persists new entries,
+# so disk writes never block the caller or the event loop
+_cache_writer: ThreadPoolExecutor | None = None
+_cache_writer_conn: sqlite3.Connection | None = None
+# Entries queued by this process (key -> (value, expires)); answers repeat
+# lookups until the background write has landed, then the entry is dropped
+_cache_recent: dict[str, tuple[str, int]] = {}
+# Set once the cache could not be opened or read; lookups are then skipped
+_cache_unavailable = False
+
+
+def _open_cache() -> sqlite3.Connection:
+    """Open a connection to the SQLite database backing the response cache."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(CACHE_DIR, "llm.sqlite"), check_same_thread=False)
+    # WAL lets concurrent runs read the cache while another one writes;
+    # with synchronous=NORMAL each insert is an append to the WAL without
+    # its own fsync (a crash may drop the newest entries, never corrupt).
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires INTEGER NOT NULL)"
+    )
+    return conn
+
+
+def _get_cache() -> sqlite3.Connection:
+    """Open (once) the connection used for cache lookups."""
+    global _cache_conn
+    if _cache_conn is None:
+        _cache_conn = _open_cache()
+    return _cache_conn
+
+
+def _cache_key(
+    symbol: str | None,
+    price: float | None,
+    extra_prompt: str | None,
+    prompt: str | None,
+) -> str:
+    """
+    Hash a request into a cache key.
+
+    Prices are rounded to 2 decimals so that quotes differing only by noise
+    share an entry.
+    """
+    payload = json.dumps(
+        {
+            "model": MODEL,
+            "symbol": symbol,
+            "price": round(price, 2) if price is not None else None,
+            "prompt": prompt,
+            "extra_prompt": extra_prompt,
+        },
+        sort_keys=True,
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _cache_get(key: str) -> str | None:
+    """
+    Return the cached response for ``key`` if present and not expired.
+
+    An unusable cache (unwritable directory, locked or corrupt database) is
+    reported once and treated as a miss, so the request still reaches the API.
+    """
+    global _cache_unavailable
+    now = int(time.time())
+    recent = _cache_recent.get(key)
+    if recent is not None:
+        if recent[1] > now:
+            return recent[0]
+        _cache_recent.pop(key, None)
+    if _cache_unavailable:
+        return None
+    try:
+        row = _get_cache().execute(
+            "SELECT value FROM llm_cache WHERE key = ? AND expires > ?", (key, now)
+        ).fetchone()
+    except (OSError, sqlite3.Error) as e:
+        _cache_unavailable = True
+        print(f"[llm_cache] cache unavailable, continuing without it: {e}", file=sys.stderr)
+        return None
+    return row[0] if row else None
+
+
+def _cache_write(key: str, value: str, expires: int) -> None:
+    """Persist one cache entry; runs on the cache writer thread."""
+    global _cache_writer_conn
+    try:
+        if _cache_writer_conn is None:
+            _cache_writer_conn = _open_cache()
+            # Drop entries left expired by earlier runs so the file does not grow without bound
+            with _cache_writer_conn:
+                _cache_writer_conn.execute("DELETE FROM llm_cache WHERE expires <= ?", (int(time.time()),))
+        with _cache_writer_conn:
+            _cache_writer_conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires) VALUES (?, ?, ?)",
+                (key, value, expires),
+            )
+    except (OSError, sqlite3.Error) as e:
+        # The cache is best-effort; a failed write only costs a future API call
+        print(f"[llm_cache] failed to store entry: {e}", file=sys.stderr)
+    finally:
+        # Stop holding the entry in memory unless a newer one replaced it meanwhile
+        if _cache_recent.get(key) == (value, expires):
+            del _cache_recent[key]
+
+
+def _cache_set(key: str, value: str, ttl: int) -> None:
+    """Queue a non-empty response to be stored under ``key`` for ``ttl`` seconds."""
+    global _cache_writer
+    if not value:
+        return
+    if _cache_writer is None:
+        _cache_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="llm-cache")
+        # Drain pending writes before the interpreter exits
+        atexit.register(_cache_writer.shutdown, wait=True)
+    expires = int(time.time()) + ttl
+    _cache_recent[key] = (value, expires)
+    _cache_writer.submit(_cache_write, key, value, expires)
+
+
+def llm_cache(ttl: int | None = None):
+    """
+    Cache the result of an ``analyze_quote``-style function on disk.
+
+    The key covers the model, symbol, price rounded to 2 decimals, prebuilt
+    prompt and extra prompt. On a hit the cached answer is returned (and
+    passed to ``on_delta``) without calling the API. Works for both sync and
+    async functions; the wrapped function also accepts ``cache=False`` to
+    bypass the cache for one call (e.g. prompts that embed a timestamp and
+    can never be hit again).
+
+    Parameters:
+        ttl: lifetime of an entry in seconds; defaults to ``CACHE_TTL``. A
+            value of 0 or less disables caching.
+    """
+    def decorator(func):
+        def lookup(symbol, price, extra_prompt, prompt, on_delta, cache):
+            ttl_s = CACHE_TTL if ttl is None else ttl
+            if ttl_s <= 0 or not cache:
+                return None, None, ttl_s
+            key = _cache_key(symbol, price, extra_prompt, prompt)
+            cached = _cache_get(key)
+            if cached is not None and on_delta:
+                on_delta(cached)
+            return key, cached, ttl_s
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(symbol=None, price=None, extra_prompt=None, *, prompt=None, on_delta=None, cache=True):
+                key, cached, ttl_s = lookup(symbol, price, extra_prompt, prompt, on_delta, cache)
+                if cached is not None:
+                    return cached
+                result = await func(symbol, price, extra_prompt, prompt=prompt, on_delta=on_delta)
+                if key is not None:
+                    _cache_set(key, result, ttl_s)
+                return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(symbol=None, price=None, extra_prompt=None, *, prompt=None, on_delta=None, cache=True):
+            key, cached, ttl_s = lookup(symbol, price, extra_prompt, prompt, on_delta, cache)
+            if cached is not None:
+                return cached
+            result = func(symbol, price, extra_prompt, prompt=prompt, on_delta=on_delta)
+            if key is not None:
+                _cache_set(key, result, ttl_s)
+            return result
+        return wrapper
+
+    return decorator
+
+
+def _is_transient(exc: BaseException) -> bool:
+    """
+    Return True for API errors worth retrying (rate limits, timeouts, 5xx, dropped connections).
+
+    A connection dropped while a stream is being read surfaces as a raw
+    ``httpx`` transport error rather than ``openai.APIConnectionError``.
+    Failures after part of the answer was already passed to ``on_delta`` are
+    not retried, since a new attempt would print a second, different answer.
+    """
+    import httpx
+    import openai
+
+    if getattr(exc, "_delta_emitted", False):
+        return False
+    return isinstance(
+        exc,
+        (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError, httpx.TransportError),
+    )
+
+
+# Retry transient failures with jittered exponential backoff so that one flaky
+# request does not sink a batch and concurrent callers do not retry in lockstep.
+_retry_transient = retry(
+    stop=stop_after_attempt(5),
+    wait=wait_exponential_jitter(initial=1, max=30),
+    retry=retry_if_exception(_is_transient),
+    reraise=True,
+)
 
 
-def analyze_quote(symbol: str, price: float, extra_prompt: str | None = None) -> str:
+def _build_messages(
+    symbol: str | None,
+    price: float | None,
+    extra_prompt: str | None = None,
+    prompt: str | None = None,
+) -> list[dict]:
+    """
+    Construct the chat messages for a quote analysis or a prebuilt prompt.
+
+    For single quotes the text shared by every request (role and extra
+    instructions) comes first and the symbol/price line last, so requests in
+    a batch share a common prefix that the provider's prompt cache can reuse.
+    """
+    if prompt is not None:
+        prompt_parts = [prompt]
+        if extra_prompt:
+            prompt_parts.append(extra_prompt)
+    elif symbol is None or price is None:
+        raise ValueError("symbol and price are required when no prompt is given")
+    else:
+        prompt_parts = [
+            "You are a professional stock analyst. Provide a concise analysis of the current market condition for the quote below.",
+        ]
+        if extra_prompt:
+            prompt_parts.append(extra_prompt)
+        prompt_parts.append(f"Quote: {symbol} at price {price}.")
+    user_message = "\n".join(prompt_parts)
+
+    return [
+        {"role": "user", "content": user_message}
+    ]
+
+
+def _delta_text(chunk) -> str:
+    """Return the content fragment carried by a streamed completion chunk."""
+    if not chunk.choices:
+        return ""
+    # The reasoning model also streams reasoning_content; we keep only the final content.
+    return getattr(chunk.choices[0].delta, "content", None) or ""
+
+
+def _collect_stream(response, on_delta: Callable[[str], None] | None = None) -> str:
+    """Join a streamed completion into one string, reporting each fragment to ``on_delta``."""
+    result_chunks = []
+    try:
+        for chunk in response:
+            text = _delta_text(chunk)
+            if text:
+                result_chunks.append(text)
+                if on_delta:
+                    on_delta(text)
+    except Exception as e:
+        # Tell _is_transient that output already reached the caller
+        if on_delta and result_chunks:
+            e._delta_emitted = True
+        raise
+    return "".join(result_chunks)
+
+
+async def _collect_stream_async(response, on_delta: Callable[[str], None] | None = None) -> str:
+    """Asynchronous variant of ``_collect_stream``."""
+    result_chunks = []
+    try:
+        async for chunk in response:
+            text = _delta_text(chunk)
+            if text:
+                result_chunks.append(text)
+                if on_delta:
+                    on_delta(text)
+    except Exception as e:
+        if on_delta and result_chunks:
+            e._delta_emitted = True
+        raise
+    return "".join(result_chunks)
+
+
+@_retry_transient
+def _complete(messages: list[dict], on_delta: Callable[[str], None] | None = None) -> str:
+    """Send ``messages`` to the model and return the streamed answer."""
+    # Call the DeepSeek reasoning model (deepseek-reasoner) via OpenAI SDK,
+    # streaming the answer so output is available before generation finishes.
+    response = _get_client().chat.completions.create(
+        model=MODEL,
+        messages=messages,
+        stream=True,
+    )
+    return _collect_stream(response, on_delta)
+
+
+@_retry_transient
+async def _complete_async(messages: list[dict], on_delta: Callable[[str], None] | None = None) -> str:
+    """Asynchronous variant of ``_complete``, bounded by the shared semaphore."""
+    client, sem = _init_async()
+    async with sem:
+        response = await client.chat.completions.create(
+            model=MODEL,
+            messages=messages,
+            stream=True,
+        )
+        return await _collect_stream_async(response, on_delta)
+
+
+@llm_cache()
+def analyze_quote(
+    symbol: str | None = None,
+    price: float | None = None,
+    extra_prompt: str | None = None,
+    *,
+    prompt: str | None = None,
+    on_delta: Callable[[str], None] | None = None,
+) -> str:
     """
     Analyze a real-time quote using DeepSeek API.
 
@@ -15,6 +416,13 @@ def analyze_quote(symbol: str, price: float, extra_prompt: str | None = None) ->
         symbol: stock symbol such as "700.HK" or "AAPL.US".
         price: latest price as a float.
         extra_prompt: optional additional instructions to be appended to the prompt.
+        prompt: optional prebuilt prompt (e.g. covering several symbols) sent in
+            place of the single-quote prompt; symbol and price are then ignored.
+        on_delta: optional callback receiving each content fragment as it is
+            streamed; a cached answer is passed in one piece.
+
+    Responses are cached on disk by ``llm_cache``; pass ``cache=False`` to
+    skip the cache for a one-off prompt.
 
     Returns:
         A string containing the analysis returned by the model.
@@ -22,38 +430,115 @@ def analyze_quote(symbol: str, price: float, extra_prompt: str | None = None) ->
     if not API_KEY:
         raise ValueError("DEEPSEEK_API_KEY is not set in environment variables")
 
-    # Initialize OpenAI client pointing to the DeepSeek endpoint.
-    client = OpenAI(api_key=API_KEY, base_url=BASE_URL)
+    messages = _build_messages(symbol, price, extra_prompt, prompt)
+    return _complete(messages, on_delta)
 
-    # Construct the user message for analysis.
-    prompt_parts = [
-        f"You are a professional stock analyst. Provide a concise analysis of the current market condition for {symbol} at price {price}.",
-    ]
-    if extra_prompt:
-        prompt_parts.append(extra_prompt)
-    user_message = "\n".join(prompt_parts)
 
-    messages = [
-        {"role": "user", "content": user_message}
-    ]
+@llm_cache()
+async def analyze_quote_async(
+    symbol: str | None = None,
+    price: float | None = None,
+    extra_prompt: str | None = None,
+    *,
+    prompt: str | None = None,
+    on_delta: Callable[[str], None] | None = None,
+) -> str:
+    """
+    Asynchronous variant of ``analyze_quote``.
 
-    # Call the DeepSeek reasoning model (deepseek-reasoner) via OpenAI SDK.
-    response = client.chat.completions.create(
-        model="deepseek-reasoner",
-        messages=messages,
-        stream=False,
-    )
+    Uses a shared ``AsyncOpenAI`` client so that many quotes can be analyzed
+    concurrently (see ``analyze_quotes``) over one connection pool. At most
+    ``MAX_CONCURRENCY`` requests are in flight at any time.
+    """
+    if not API_KEY:
+        raise ValueError("DEEPSEEK_API_KEY is not set in environment variables")
+
+    messages = _build_messages(symbol, price, extra_prompt, prompt)
+    return await _complete_async(messages, on_delta)
+
+
+def analyze_quotes(
+    quotes: Sequence[tuple[str, float]],
+    extra_prompt: str | None = None,
+    return_exceptions: bool = False,
+) -> list[str | BaseException]:
+    """
+    Analyze several quotes concurrently.
+
+    Parameters:
+        quotes: sequence of (symbol, price) pairs.
+        extra_prompt: optional additional instructions applied to every quote.
+        return_exceptions: if True, a quote whose analysis fails (after retries)
+            gets the exception in its slot instead of aborting the whole batch.
+
+    Returns:
+        A list of analyses in the same order as ``quotes``. Identical
+        (symbol, price) pairs are sent once and share the same analysis.
+    """
+    # Map each distinct request to the positions that asked for it
+    unique: dict[tuple[str, float], list[int]] = {}
+    for i, (symbol, price) in enumerate(quotes):
+        unique.setdefault((symbol, price), []).append(i)
 
-    # Extract the content from the response. The reasoning model may include reasoning_content; we return only the final content.
-    result = ""
-    if response and response.choices:
-        msg = response.choices[0].message
-        # 'message' may have attributes like 'reasoning_content' in the SDK; use getattr to safely access.
-        content = getattr(msg, "content", None)
-        if content:
-            result = content
+    async def _run() -> list[str | BaseException]:
+        tasks = [analyze_quote_async(symbol, price, extra_prompt) for symbol, price in unique]
+        try:
+            return list(await asyncio.gather(*tasks, return_exceptions=return_exceptions))
+        finally:
+            # The client is bound to this loop, which asyncio.run closes on return
+            await _close_async()
 
-    return result
+    results: list[str | BaseException] = [""] * len(quotes)
+    for indices, analysis in zip(unique.values(), asyncio.run(_run())):
+        for i in indices:
+            results[i] = analysis
+    return results
+
+
+def _parse_analysis_array(text: str, expected: int) -> list[str] | None:
+    """Extract a JSON array of ``expected`` strings from a model answer, or None."""
+    # The model may wrap the array in prose or a ```json fence
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end < start:
+        return None
+    try:
+        items = json.loads(text[start:end + 1])
+    except ValueError:
+        return None
+    if not isinstance(items, list) or len(items) != expected:
+        return None
+    return [item if isinstance(item, str) else json.dumps(item, ensure_ascii=False) for item in items]
+
+
+def analyze_quotes_bulk(quotes: Sequence[tuple[str, float]], extra_prompt: str | None = None) -> list[str]:
+    """
+    Analyze several quotes with a single DeepSeek request.
+
+    The model is asked for a JSON array with one analysis per quote. If the
+    answer cannot be parsed into an array of the right length, the quotes are
+    analyzed individually via ``analyze_quotes``.
+
+    Parameters:
+        quotes: sequence of (symbol, price) pairs.
+        extra_prompt: optional additional instructions applied to every quote.
+
+    Returns:
+        A list of analyses in the same order as ``quotes``.
+    """
+    if not quotes:
+        return []
+    lines = [
+        "You are a professional stock analyst. Provide a concise analysis of the current market condition for each of the following quotes:",
+    ]
+    lines.extend(f"{i}. {symbol} @ {price}" for i, (symbol, price) in enumerate(quotes, start=1))
+    lines.append(
+        f"Return only a JSON array of length {len(quotes)} containing one analysis string per item, in the same order."
+    )
+    answer = analyze_quote(prompt="\n".join(lines), extra_prompt=extra_prompt)
+    analyses = _parse_analysis_array(answer, len(quotes))
+    if analyses is None:
+        return analyze_quotes(quotes, extra_prompt)
+    return analyses
 
 
 if __name__ == "__main__":
@@ -65,16 +550,7 @@ if __name__ == "__main__":
     Example:
         python deepseek_analysis.py 700.HK 50.0
     """
-    parser = argparse.ArgumentParser(description="DeepSeek quote analysis")
-    parser.add_argument("symbol", nargs="?", default=os.getenv("QUOTE_SYMBOL", "700.HK"), help="Stock symbol")
-    parser.add_argument("price", nargs="?", type=float, default=float(os.getenv("QUOTE_PRICE", "0.0")), help="Latest price")
-    # Add optional parameters for future prompt support
-    parser.add_argument("--prompt-module", dest="prompt_module", default=None, help="Prompt module name (optional)")
-    parser.add_argument("--scenario", dest="scenario", default=None, help="Scenario name (optional)")
-    args = parser.parse_args()
-
-    symbol = args.symbol
-    price = args.price
-    # Note: prompt_module and scenario are parsed but not used in this script
-    analysis = analyze_quote(symbol, price)
-    print(analysis)
\ No newline at end of file
+    symbol = sys.argv[1] if len(sys.argv) > 1 else os.getenv("QUOTE_SYMBOL", "700.HK")
+    price = float(sys.argv[2]) if len(sys.argv) > 2 else float(os.getenv("QUOTE_PRICE", "0.0"))
+    analyze_quote(symbol, price, on_delta=lambda text: print(text, end="", flush=True))
+    print()
\ No newline at end of file
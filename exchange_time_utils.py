@@ -33,8 +33,9 @@ Example usage:
 
 Functions
 ---------
-add_exchange_time_fields(records, tz_map=None, current_time=None)
-    Adds 'local_time' and 'utc_time' ISO strings to each record.
+add_exchange_time_fields(records, tz_map=None, current_time=None, inplace=False)
+    Adds 'local_time' and 'utc_time' ISO strings to each record (updating
+    the records themselves when inplace=True).
 
 generate_deepseek_prompt(records, title, tasks, extra_requirements, summary_words)
     Builds a prompt string incorporating enriched records and analysis instructions.
@@ -43,9 +44,16 @@ generate_deepseek_prompt(records, title, tasks, extra_requirements, summary_word
 from __future__ import annotations
 
 import json
-from datetime import datetime
+from datetime import datetime, timezone
 from typing import Iterable, List, Dict, Optional, Sequence, Union, Mapping
 
+try:
+    # orjson serializes UTF-8 directly in C; fall back to the stdlib encoder.
+    # Output can differ in number formatting (orjson writes 1e-05 as 0.00001).
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore[assignment]
+
 try:
     # zoneinfo is available in Python >= 3.9
     from zoneinfo import ZoneInfo
@@ -65,11 +73,58 @@ EXCHANGE_TZ: Mapping[str, str] = {
     "SGX": "Asia/Singapore",       # Singapore Exchange
 }
 
+# ZoneInfo objects for the default mapping, resolved once at import time.
+_TZ_CACHE: Dict[str, ZoneInfo] = {code: ZoneInfo(tz) for code, tz in EXCHANGE_TZ.items()}
+
+
+# Default analysis instructions used by generate_deepseek_prompt
+_DEFAULT_TASKS: Sequence[str] = (
+    "将以上数据转换为表格形式（每行一只标的）；",
+    "计算以下指标：股息收益率 = dividend / bps；EPS增长率 = (eps_ttm - eps) / eps（若 eps=0 则置为null）；",
+    "统计并比较：① 股息收益率最高的前3家公司；② EPS_TTM 最高的前3家公司；",
+    "按 currency 分组对比平均 eps_ttm、bps、dividend；",
+    "检测异常：如 dividend > eps_ttm、eps_ttm < 0、或缺失关键字段；在结果表格中以“⚠️”标注；",
+    "以 Markdown 表格输出列：symbol/name_cn/currency/eps_ttm/bps/dividend/股息收益率/EPS增长率/ local_time / utc_time；",
+)
+_DEFAULT_EXTRA: Sequence[str] = (
+    "结尾给出中文总结，说明整体财务特征、差异与显著异常。",
+)
+
+
+def _format_tasks(tasks: Iterable[str]) -> str:
+    """Render analysis tasks as a numbered list."""
+    return "\n".join([f"{idx+1}️⃣ {t}" for idx, t in enumerate(tasks)])
+
+
+def _format_extra(extra: Iterable[str]) -> str:
+    """Render extra requirements as a bulleted list."""
+    return "\n".join([f"- {e}" for e in extra])
+
+
+# Rendered once since the defaults never change
+_DEFAULT_TASKS_TEXT = _format_tasks(_DEFAULT_TASKS)
+_DEFAULT_EXTRA_TEXT = _format_extra(_DEFAULT_EXTRA)
+
+
+def _resolve_zone(code: str, tz_map: Mapping[str, str]) -> Optional[ZoneInfo]:
+    """Return the timezone for an exchange code, or None if unknown or unresolvable."""
+    if tz_map is EXCHANGE_TZ and code in _TZ_CACHE:
+        return _TZ_CACHE[code]
+    tz_name = tz_map.get(code)
+    if not tz_name:
+        return None
+    try:
+        return ZoneInfo(tz_name)
+    except Exception:
+        # In case the timezone cannot be resolved, treat it as unknown
+        return None
+
 
 def add_exchange_time_fields(
     records: Sequence[Dict[str, Union[str, float, int, list, None]]],
     tz_map: Optional[Mapping[str, str]] = None,
     current_time: Optional[datetime] = None,
+    inplace: bool = False,
 ) -> List[Dict[str, Union[str, float, int, list, None]]]:
     """Enrich each record with local and UTC timestamps.
 
@@ -77,9 +132,10 @@ def add_exchange_time_fields(
     ----------
     records : Sequence[Dict[str, Any]]
         An iterable of dictionaries representing stock data. Each record must
-        contain an 'exchange' key identifying the trading venue. The function
-        does not mutate the original records; instead, it returns a new list
-        containing shallow copies with additional keys.
+        contain an 'exchange' key identifying the trading venue. Unless
+        ``inplace`` is set, the function does not mutate the original records;
+        instead, it returns a new list containing shallow copies with
+        additional keys.
 
     tz_map : Optional[Mapping[str, str]]
         A mapping from exchange codes to IANA timezone strings. If omitted,
@@ -88,8 +144,14 @@ def add_exchange_time_fields(
 
     current_time : Optional[datetime]
         The reference UTC time used for conversion. If None, the current
-        system UTC time is used via ``datetime.utcnow()``. This parameter
-        exists primarily to facilitate deterministic testing.
+        system UTC time is used via ``datetime.now(timezone.utc)``. Naive
+        values are interpreted as UTC; aware values are converted to UTC.
+        This parameter exists primarily to facilitate deterministic testing.
+
+    inplace : bool, optional
+        If True, add the time fields to the given records directly instead of
+        copying them first. Useful when the caller does not need the
+        originals. Defaults to False.
 
     Returns
     -------
@@ -109,24 +171,31 @@ def add_exchange_time_fields(
     """
 
     tz_map = tz_map or EXCHANGE_TZ
-    now_utc = (current_time or datetime.utcnow()).replace(tzinfo=ZoneInfo("UTC"))
+    if current_time is None:
+        now_utc = datetime.now(timezone.utc)
+    elif current_time.tzinfo is None:
+        # Naive reference times are interpreted as UTC
+        now_utc = current_time.replace(tzinfo=timezone.utc)
+    else:
+        now_utc = current_time.astimezone(timezone.utc)
+    utc_iso = now_utc.isoformat()
+    # Local time string per exchange code; computed once per distinct exchange
+    local_iso: Dict[str, Optional[str]] = {}
     enriched: List[Dict[str, Union[str, float, int, list, None]]] = []
     for rec in records:
-        # Make a shallow copy to avoid mutating the input
-        enriched_rec = dict(rec)
+        # Shallow-copy unless the caller asked for in-place enrichment
+        enriched_rec = rec if inplace else dict(rec)
         exchange = enriched_rec.get("exchange")
-        tz_name = tz_map.get(str(exchange)) if exchange is not None else None
-        if tz_name:
-            try:
-                local_time = now_utc.astimezone(ZoneInfo(tz_name))
-                enriched_rec["local_time"] = local_time.isoformat()
-            except Exception:
-                # In case the timezone cannot be resolved, set None
-                enriched_rec["local_time"] = None
-        else:
+        if exchange is None:
             enriched_rec["local_time"] = None
+        else:
+            code = str(exchange)
+            if code not in local_iso:
+                tz = _resolve_zone(code, tz_map)
+                local_iso[code] = now_utc.astimezone(tz).isoformat() if tz else None
+            enriched_rec["local_time"] = local_iso[code]
         # Always include UTC time
-        enriched_rec["utc_time"] = now_utc.isoformat()
+        enriched_rec["utc_time"] = utc_iso
         enriched.append(enriched_rec)
     return enriched
 
@@ -151,7 +220,10 @@ def generate_deepseek_prompt(
     ----------
     records : Sequence[Dict[str, Any]]
         The stock records to include in the prompt. Records will be
-        serialized using ``json.dumps`` with non-ASCII characters preserved.
+        serialized using ``orjson`` (or ``json.dumps`` when it is not
+        installed or cannot encode them, e.g. ints beyond 64 bits) with
+        non-ASCII characters preserved. The two encoders may format floats
+        differently.
 
     title : str, optional
         A preamble describing the role of the AI and the overall analysis
@@ -177,37 +249,38 @@ def generate_deepseek_prompt(
         A structured prompt ready to be sent to DeepSeek for analysis.
     """
 
-    default_tasks = [
-        "将以上数据转换为表格形式（每行一只标的）；",
-        "计算以下指标：股息收益率 = dividend / bps；EPS增长率 = (eps_ttm - eps) / eps（若 eps=0 则置为null）；",
-        "统计并比较：① 股息收益率最高的前3家公司；② EPS_TTM 最高的前3家公司；",
-        "按 currency 分组对比平均 eps_ttm、bps、dividend；",
-        "检测异常：如 dividend > eps_ttm、eps_ttm < 0、或缺失关键字段；在结果表格中以“⚠️”标注；",
-        "以 Markdown 表格输出列：symbol/name_cn/currency/eps_ttm/bps/dividend/股息收益率/EPS增长率/ local_time / utc_time；",
-    ]
-    default_extra = [
-        "结尾给出中文总结，说明整体财务特征、差异与显著异常。",
-    ]
-    tasks_list = list(tasks) if tasks else default_tasks
-    extra_list = list(extra_requirements) if extra_requirements else default_extra
+    tasks_text = _format_tasks(tasks) if tasks else _DEFAULT_TASKS_TEXT
+
     # Append summary length hint if absent
     summary_hint = f"中文总结请控制在约{summary_words}字。"
-    if not any(summary_hint in req for req in extra_list):
-        extra_list.append(summary_hint)
+    if extra_requirements:
+        extra_list = list(extra_requirements)
+        if not any(summary_hint in req for req in extra_list):
+            extra_list.append(summary_hint)
+        extra_text = _format_extra(extra_list)
+    else:
+        # The default requirements never contain the hint, so it is always appended
+        extra_text = f"{_DEFAULT_EXTRA_TEXT}\n- {summary_hint}"
 
     # Serialize records to JSON, preserving non-ASCII characters for Chinese labels
-    data_json = json.dumps(list(records), ensure_ascii=False, indent=2)
-
-    tasks_text = "\n".join([f"{idx+1}️⃣ {t}" for idx, t in enumerate(tasks_list)])
-    extra_text = "\n".join([f"- {e}" for e in extra_list])
-
-    prompt = (
-        f"{title}\n\n"
-        f"【输入数据】\n{data_json}\n\n"
-        f"【分析任务】\n{tasks_text}\n\n"
-        f"【额外要求】\n{extra_text}\n"
-    )
-    return prompt
+    rows = records if isinstance(records, list) else list(records)
+    data_json = None
+    if orjson is not None:
+        try:
+            data_json = orjson.dumps(rows, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits, which json.dumps accepts
+            pass
+    if data_json is None:
+        data_json = json.dumps(rows, ensure_ascii=False, indent=2)
+
+    # Join the pre-rendered sections in one pass
+    return "\n".join([
+        title, "",
+        "【输入数据】", data_json, "",
+        "【分析任务】", tasks_text, "",
+        "【额外要求】", extra_text, "",
+    ])
 
 
 __all__ = [
@@ -22,13 +22,21 @@ getStockDetails(resp)
 translate_keys(data)
     Recursively translate English keys in dictionaries/lists to Chinese labels
     using the KEY_MAP mapping.
+
+translate_flat(d)
+    Translate the keys of a flat dictionary using the KEY_MAP mapping.
 """
 
 from __future__ import annotations
 
-import json
 import re
-from longport.openapi import QuoteContext, Config
+from decimal import Decimal
+
+try:
+    # orjson parses faster and raises a json.JSONDecodeError subclass on bad input
+    from orjson import loads as _loads
+except ImportError:  # pragma: no cover
+    from json import loads as _loads
 
 # Mapping of English keys returned by the API to their Chinese descriptions
 KEY_MAP = {
@@ -51,11 +59,40 @@ KEY_MAP = {
     "board": "标的所属板块",
 }
 
+# Fields read from SecurityStaticInfo, in output order
+_STATIC_FIELDS = (
+    "symbol", "name_cn", "name_en", "name_hk", "exchange", "currency",
+    "lot_size", "total_shares", "circulating_shares", "hk_shares",
+    "eps", "eps_ttm", "bps", "dividend_yield", "stock_derivatives", "board",
+)
+# (attribute, Chinese label) pairs for _STATIC_FIELDS
+_STATIC_LABELS = tuple((k, KEY_MAP.get(k, k)) for k in _STATIC_FIELDS)
+
+# Patterns used by force_to_dict, compiled once at import time
+_RE_KEY = re.compile(r'(\b\w+\b)\s*:')
+_RE_LIST = re.compile(r':\s*\[([^\]]*)\]')
+_RE_BAREVAL = re.compile(r':\s*(?!\[|\{|"|[+-]?\d|\btrue\b|\bfalse\b|\bnull\b)([A-Za-z_][A-Za-z0-9_.-]*)')
+_RE_QUOTED = re.compile(r'"[^" ]*"')
+_RE_NUM = re.compile(r'[+-]?\d+(\.\d+)?([eE][+-]?\d+)?')
+
+
+# Long-lived LongPort quote context, opened on first use and reused afterwards
+_quote_ctx = None
+
+
+def _get_quote_context():
+    """Return the shared QuoteContext, creating it from the environment on first use."""
+    global _quote_ctx
+    if _quote_ctx is None:
+        from longport.openapi import QuoteContext, Config
+
+        _quote_ctx = QuoteContext(Config.from_env())
+    return _quote_ctx
+
 
 def getBasicStatus(symbol: list[str]):
     """Fetch static information for the given symbols via LongPort."""
-    config = Config.from_env()
-    ctx = QuoteContext(config)
+    ctx = _get_quote_context()
     resp = ctx.static_info(symbol)
     return resp
 
@@ -73,7 +110,7 @@ def force_to_dict(text: str):
     s = s.replace(r'\"', '"')
 
     # 2) Quote bare keys (key: → "key":)
-    s = re.sub(r'(\b\w+\b)\s*:', r'"\1":', s)
+    s = _RE_KEY.sub(r'"\1":', s)
 
     # 3) Quote bare items in lists (e.g. [Warrant, ABC] → ["Warrant", "ABC"])
     def quote_list_items(m):
@@ -82,33 +119,61 @@ def force_to_dict(text: str):
         fixed = []
         for x in items:
             # Already quoted, numeric, boolean, or null values are left as-is
-            if re.fullmatch(r'"[^" ]*"', x) or re.fullmatch(r'[+-]?\d+(\.\d+)?([eE][+-]?\d+)?', x) \
+            if _RE_QUOTED.fullmatch(x) or _RE_NUM.fullmatch(x) \
                or x.lower() in ('true', 'false', 'null'):
                 fixed.append(x)
             else:
                 fixed.append(f'"{x}"')
         return ': [' + ', '.join(fixed) + ']'
-    s = re.sub(r':\s*\[([^\]]*)\]', quote_list_items, s)
+    s = _RE_LIST.sub(quote_list_items, s)
 
     # 4) Quote bare values following colons (avoid numbers/booleans/null/lists/dicts)
-    s = re.sub(
-        r':\s*(?!\[|\{|"|[+-]?\d|\btrue\b|\bfalse\b|\bnull\b)([A-Za-z_][A-Za-z0-9_.-]*)',
-        r': "\1"', s
-    )
+    s = _RE_BAREVAL.sub(r': "\1"', s)
 
     # 5) Parse as JSON
-    return json.loads(s)
+    return _loads(s.encode("utf-8"))
+
+
+# Exact types _plain passes through untouched (checked before any isinstance)
+_SCALAR_TYPES = frozenset({str, bool, int, float, type(None)})
+
+
+def _plain(value):
+    """Convert an SDK attribute value into a JSON-serializable value."""
+    # Fast path on the exact type: the SDK returns plain scalars and Decimal
+    cls = type(value)
+    if cls in _SCALAR_TYPES:
+        return value
+    if cls is Decimal:
+        return float(value)
+    if isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    # Enum members (e.g. SecurityBoard.HKEquity) become their member name,
+    # matching what force_to_dict recovers from the repr.
+    return str(value).rsplit(".", 1)[-1]
+
+
+def _parse_one(stock) -> dict:
+    """Format a single static info item with translated keys."""
+    if hasattr(stock, "symbol"):
+        return {label: _plain(getattr(stock, k, None)) for k, label in _STATIC_LABELS}
+    raw = str(stock).replace("SecurityStaticInfo ", "")
+    return translate_flat(force_to_dict(raw))
 
 
 def getStockDetails(resp: list) -> list[dict]:
-    """Convert a list of LongPort static info responses into formatted dictionaries."""
-    temp = []
-    for stock in resp:
-        raw = str(stock).replace("SecurityStaticInfo ", "")
-        resp_formated = force_to_dict(raw)
-        formatted_data = translate_keys(resp_formated)
-        temp.append(formatted_data)
-    return temp
+    """
+    Convert a list of LongPort static info responses into formatted dictionaries.
+
+    Fields are read directly from the ``SecurityStaticInfo`` attributes; items
+    that do not expose them fall back to parsing their string form with
+    ``force_to_dict``.
+    """
+    return [_parse_one(stock) for stock in resp]
 
 
 def translate_keys(data):
@@ -128,9 +193,15 @@ def translate_keys(data):
         return data
 
 
+def translate_flat(d: dict, _get=KEY_MAP.get) -> dict:
+    """Translate the keys of a flat dict to Chinese; values are left untouched."""
+    return {_get(k, k): v for k, v in d.items()}
+
+
 __all__ = [
     "getBasicStatus",
     "force_to_dict",
     "getStockDetails",
     "translate_keys",
+    "translate_flat",
 ]
\ No newline at end of file
@@ -1,7 +1,7 @@
 import os
 import argparse
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
 
 from utils_symbols import read_symbols
 from format_response import getBasicStatus, getStockDetails
@@ -28,26 +28,30 @@ def main():
     resp = getBasicStatus(symbols)
     details = getStockDetails(resp)
 
+    # One reference time for the whole run, so the prompt timestamps and the
+    # output filename agree
+    now = datetime.now(timezone.utc)
+
     # Enrich details with local and UTC time based on exchange
-    enriched_records = add_exchange_time_fields(details)
+    enriched_records = add_exchange_time_fields(details, current_time=now, inplace=True)
 
     # Generate the prompt for DeepSeek
     prompt = generate_deepseek_prompt(enriched_records)
     if args.extra_prompt:
         prompt = f"{prompt}\n\n{args.extra_prompt}"
 
-    # DeepSeek analysis
-    analysis = analyze_quote([prompt])
+    # DeepSeek analysis: one request covering every symbol, echoed as it streams.
+    # The prompt embeds the current time, so caching it would only add dead rows.
+    analysis = analyze_quote(prompt=prompt, cache=False, on_delta=lambda text: print(text, end="", flush=True))
+    print()
 
     # Write to file
     out_dir = Path(args.output_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
-    filename = out_dir / f"analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-    with open(filename, "w", encoding="utf-8") as f:
-        f.write("Prompt:\n")
-        f.write(prompt + "\n\n")
-        f.write("Analysis & Suggestions:\n")
-        f.write(analysis + "\n")
+    filename = out_dir / f"analysis_{now.astimezone().strftime('%Y%m%d_%H%M%S')}.txt"
+    parts = ["Prompt:\n", prompt, "\n\n", "Analysis & Suggestions:\n", analysis, "\n"]
+    with open(filename, "wb", buffering=1 << 20) as f:
+        f.writelines(part.encode("utf-8") for part in parts)
 
     print(f"Analysis written to {filename}")
 
@@ -25,36 +25,62 @@ the above layers.
 
 from __future__ import annotations
 
+import copy
 import os
+import re
+from functools import lru_cache
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 
 import yaml
 
+try:
+    # libyaml-backed loader; several times faster than the pure-Python one
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader as _YamlLoader
+
 # Determine base directories relative to this file
 ROOT: Path = Path(__file__).resolve().parent
 CONF_ROOT: Path = ROOT / "config"
 PROMPTS_ROOT: Path = CONF_ROOT / "prompts"
 
+# {var} placeholders recognised by _render_template
+_PLACEHOLDER = re.compile(r"\{([A-Za-z_][A-Za-z_0-9]*)\}")
+
 
-def _read_yaml(path: Path) -> Dict[str, Any]:
-    """Safely load a YAML file. If the file does not exist, return an empty dict."""
-    if not path.exists():
-        return {}
+@lru_cache(maxsize=128)
+def _read_yaml_cached(path: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse a YAML file; cached per (path, mtime) so edits invalidate the entry."""
     with open(path, "r", encoding="utf-8") as f:
-        return yaml.safe_load(f) or {}
+        return yaml.load(f, Loader=_YamlLoader) or {}
+
+
+def _mtime_ns(path: Path) -> Optional[int]:
+    """Return the modification time of a file in nanoseconds, or None if it does not exist."""
+    try:
+        return path.stat().st_mtime_ns
+    except FileNotFoundError:
+        return None
 
 
-def _merge(a: Dict[str, Any], b: Dict[str, Any]) -> Dict[str, Any]:
-    """Merge two dictionaries, with values from b overriding those in a."""
-    out: Dict[str, Any] = dict(a or {})
-    for k, v in (b or {}).items():
-        if isinstance(v, dict) and isinstance(out.get(k), dict):
-            out[k] = _merge(out[k], v)
+def _merge_into(dst: Dict[str, Any], src: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Merge src into dst in place, with values from src overriding those in dst.
+
+    Nested dicts from src are copied on first insertion, so later merges into
+    dst never modify src.
+    """
+    for k, v in (src or {}).items():
+        if isinstance(v, dict):
+            existing = dst.get(k)
+            if not isinstance(existing, dict):
+                existing = dst[k] = {}
+            _merge_into(existing, v)
         else:
-            out[k] = v
-    return out
+            dst[k] = v
+    return dst
 
 
 def _render_template(template: Any, vars: Dict[str, Any]) -> Any:
@@ -62,13 +88,47 @@ def _render_template(template: Any, vars: Dict[str, Any]) -> Any:
     Render a simple template by replacing {var} placeholders with values.
 
     Only applies to strings; other data types are returned unchanged.
+    Placeholders without a matching variable are left as-is, and substituted
+    values are not themselves expanded.
     """
     if not isinstance(template, str):
         return template
-    result = template
-    for k, v in vars.items():
-        result = result.replace("{" + str(k) + "}", str(v))
-    return result
+    return _PLACEHOLDER.sub(
+        lambda m: str(vars[m.group(1)]) if m.group(1) in vars else m.group(0),
+        template,
+    )
+
+
+def _layer_paths(module: Optional[str], scenario: Optional[str]) -> Tuple[Path, ...]:
+    """Return the prompt files to merge for a module/scenario, lowest priority first."""
+    # 1. Foundation layer
+    paths = [PROMPTS_ROOT / "foundation.yaml"]
+    # 2. Domain layer: infer domain from module
+    if module == "realtime_analysis":
+        # realtime_analysis belongs to the analysis domain
+        paths.append(PROMPTS_ROOT / "domain" / "analysis.yaml")
+    # 3. Module layer
+    if module:
+        paths.append(PROMPTS_ROOT / "modules" / f"{module}.yaml")
+    # 4. Scenario layer
+    if scenario:
+        paths.append(PROMPTS_ROOT / "scenarios" / f"{scenario}.yaml")
+    return tuple(paths)
+
+
+@lru_cache(maxsize=128)
+def _load_merged(paths: Tuple[Path, ...], mtimes: Tuple[Optional[int], ...]) -> Dict[str, Any]:
+    """
+    Merge the given layers without rendering templates.
+
+    ``mtimes`` is part of the cache key so that editing any layer produces a
+    fresh merge. The result is shared between calls and must not be mutated.
+    """
+    merged: Dict[str, Any] = {}
+    for path, mtime in zip(paths, mtimes):
+        if mtime is not None:
+            _merge_into(merged, _read_yaml_cached(str(path), mtime))
+    return merged
 
 
 def load_prompt(
@@ -95,26 +155,9 @@ def load_prompt(
         A merged prompt configuration with templates rendered using runtime
         variables.
     """
-    # 1. Foundation layer
-    foundation = _read_yaml(PROMPTS_ROOT / "foundation.yaml")
-
-    # 2. Domain layer: infer domain from module, fallback to empty
-    domain: Dict[str, Any] = {}
-    if module == "realtime_analysis":
-        # realtime_analysis belongs to the analysis domain
-        domain = _read_yaml(PROMPTS_ROOT / "domain" / "analysis.yaml")
-
-    # 3. Module layer
-    module_doc: Dict[str, Any] = _read_yaml(PROMPTS_ROOT / "modules" / f"{module}.yaml") if module else {}
-
-    # 4. Scenario layer
-    scen_doc: Dict[str, Any] = _read_yaml(PROMPTS_ROOT / "scenarios" / f"{scenario}.yaml") if scenario else {}
-
-    # Merge layers: lower priority first
-    merged = foundation
-    merged = _merge(merged, domain)
-    merged = _merge(merged, module_doc)
-    merged = _merge(merged, scen_doc)
+    # Merge layers (lower priority first); copy so rendering does not touch the cache
+    paths = _layer_paths(module, scenario)
+    merged = copy.deepcopy(_load_merged(paths, tuple(_mtime_ns(p) for p in paths)))
 
     # Prepare runtime variables; include current timestamp
     vars: Dict[str, Any] = {"now": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
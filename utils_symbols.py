@@ -1,13 +1,18 @@
 from __future__ import annotations
 import csv
 import re
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Set
+from typing import Dict, List
 
-_HK_RE_1 = re.compile(r"^(?:HK\.)?(\d{1,5})$", re.I)       # e.g. 700 / HK.700 / HK.00700
-_HK_RE_2 = re.compile(r"^(\d{1,5})\.HK$", re.I)            # e.g. 700.HK
-_US_RE_1 = re.compile(r"^(?:US\.)?([A-Z][A-Z0-9\-\.]{0,9})$", re.I)  # e.g. AAPL / US.AAPL
-_US_RE_2 = re.compile(r"^([A-Z0-9\-\.]{1,10})\.US$", re.I)           # e.g. AAPL.US
+# Alternatives are tried in order, so HK forms win over US forms as before
+_SYMBOL_RE = re.compile(
+    r"^(?:HK\.)?(?P<hk1>\d{1,5})$"                       # e.g. 700 / HK.700 / HK.00700
+    r"|^(?P<hk2>\d{1,5})\.HK$"                           # e.g. 700.HK
+    r"|^(?:US\.)?(?P<us1>[A-Z][A-Z0-9\-\.]{0,9})$"        # e.g. AAPL / US.AAPL
+    r"|^(?P<us2>[A-Z0-9\-\.]{1,10})\.US$",               # e.g. AAPL.US
+    re.I,
+)
 
 def _canon_hk(num: str) -> str:
     return f"HK.{int(num):05d}"
@@ -15,24 +20,18 @@ def _canon_hk(num: str) -> str:
 def _canon_us(ticker: str) -> str:
     return f"US.{ticker.upper()}"
 
+@lru_cache(maxsize=4096)
 def normalize_symbol(raw: str) -> str:
     s = raw.strip()
     if not s:
         raise ValueError("empty symbol")
 
-    m = _HK_RE_1.match(s)
+    m = _SYMBOL_RE.match(s)
     if m:
-        return _canon_hk(m.group(1))
-    m = _HK_RE_2.match(s)
-    if m:
-        return _canon_hk(m.group(1))
-
-    m = _US_RE_1.match(s)
-    if m:
-        return _canon_us(m.group(1))
-    m = _US_RE_2.match(s)
-    if m:
-        return _canon_us(m.group(1))
+        group = m.lastgroup
+        if group.startswith("hk"):
+            return _canon_hk(m.group(group))
+        return _canon_us(m.group(group))
 
     # Accept already-canonical forms
     if s.upper().startswith(("HK.", "US.")):
@@ -42,29 +41,30 @@ def normalize_symbol(raw: str) -> str:
 
 def read_symbols(csv_path: str | Path) -> List[str]:
     p = Path(csv_path)
-    if not p.exists():
-        raise FileNotFoundError(f"symbols csv not found: {p}")
+    try:
+        f = p.open(newline="", encoding="utf-8")
+    except FileNotFoundError:
+        raise FileNotFoundError(f"symbols csv not found: {p}") from None
 
-    seen: Set[str] = set()
-    out: List[str] = []
-    with p.open(newline="", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        if "symbol" not in (reader.fieldnames or []):
+    with f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        if "symbol" not in header:
             raise ValueError("CSV must have header 'symbol'")
-        for row in reader:
-            raw = (row.get("symbol") or "").strip()
-            if not raw:
-                continue
-            try:
-                canon = normalize_symbol(raw)
-            except ValueError as e:
-                # skip invalid rows but optionally log
-                print(f"[symbols] skip invalid '{raw}': {e}")
-                continue
-            if canon not in seen:
-                seen.add(canon)
-                out.append(canon)
+        col = header.index("symbol")
+        # Read the symbol column once, dropping blanks and repeated raw values (order kept)
+        raws = dict.fromkeys(filter(None, (row[col].strip() for row in reader if len(row) > col)))
+
+    # canonical symbol -> None; a dict keeps first-seen order while deduplicating
+    out: Dict[str, None] = {}
+    for raw in raws:
+        try:
+            canon = normalize_symbol(raw)
+        except ValueError as e:
+            # skip invalid rows but optionally log
+            print(f"[symbols] skip invalid '{raw}': {e}")
+            continue
+        out.setdefault(canon)
     if not out:
         raise ValueError("No valid symbols in CSV")
-    return out
-
+    return list(out)